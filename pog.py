@@ -1,42 +1,49 @@
+import argparse
+import copy
+import fnmatch
 import os.path
 from itertools import chain
-from util import load_yaml_file, write_yaml_file, plu, SQ, write_annotated_groups
+from util import load_yaml_file, dump_yaml, write_text_file, preamble, plu, SQ, write_annotated_groups, \
+    update_annotated_groups, load_invgroups, load_source_file, list_source_files
 
 
-def reduce_group_from_file(name):
+def reduce_group_from_file(name, source=None):
     """Aggregates all the group IDs given in a "groups" YAML file, both those given as integers keyed by "types" and
     those given indirectly by including other groups files named under the key "include". May be called recursively by
     reduce_groups().
 
     :param name: filename (extension should be included) from which the data should be loaded
+    :param source: where to load files from; see util.load_source_file()
     :return: set of group IDs that results from combining this file's group IDs along with the group IDs given by
      other included "groups" files
     """
-    group = load_yaml_file("groups", name)
-    return reduce_groups(group.get('types', []), group.get('include', []))
+    group = load_source_file(source, "groups", name)
+    return reduce_groups(group.get('types', []), group.get('include', []), source)
 
 
-def reduce_groups(types, names):
+def reduce_groups(types, names, source=None):
     """Aggregates group IDs given by 'types' with the group IDs given by the "groups" files given in 'names'.
     May be called recursively by reduce_group_from_file().
 
     :param types: an iterable with group IDs to be included
     :param names: an iterable with filenames (no extensions) giving the groups files to be included
+    :param source: where to load files from; see util.load_source_file()
     :return: set of (unique) group IDs resulting from the union
     """
     try:
-        return set(types).union(chain.from_iterable(map(reduce_group_from_file, names)))
+        return set(types).union(chain.from_iterable(reduce_group_from_file(name, source) for name in names))
     except KeyError:
         return set()
 
 
-def merge_groups(group_names):
+def merge_groups(group_names, source=None):
     """Aggregates the group IDs given by all the named "groups" files.
 
     :param group_names: an iterable with filenames (no extensions) giving the groups files to be included
+    :param source: where to load files from; see util.load_source_file()
     :return: sorted list of unique group IDs from all indicated files
     """
-    return list(sorted(reduce_groups([], group_names)))
+    return list(sorted(reduce_groups([], group_names, source)))
 
 
 def format_tab_color(tab):
@@ -57,31 +64,33 @@ def format_tab_color(tab):
         return None
 
 
-def format_tabs(tabs):
+def format_tabs(tabs, source=None):
     """Parses tab information to be in a YAML-friendly format.
 
     :param tabs: a dictionary of tabs information
+    :param source: where to load files from; see util.load_source_file()
     :return: a dictionary keyed by 'tabSetup' ready for export to an overview YAML file
     """
     tabs = [[i, [
             ['name', format_tab_name(v)],
-            ['overview', format_preset_name(load_preset(v['overview']))],
-            ['bracket', format_preset_name(load_preset(v['bracket']))],
+            ['overview', format_preset_name(load_preset(v['overview'], source))],
+            ['bracket', format_preset_name(load_preset(v['bracket'], source))],
             ['color', format_tab_color(v)]
             ]] for (i, v) in enumerate(tabs)]
 
     return {'tabSetup': tabs}
 
 
-def merge_states(names):
+def merge_states(names, source=None):
     """Aggregates show/hide state information given by all the named "states" files.
 
     :param names: an iterable with filenames (no extensions) giving the states files to be included
+    :param source: where to load files from; see util.load_source_file()
     :return: a dictionary of sorted lists giving the 'show' and 'hide' states, keyed respectively
     """
     merged_states = {'show': set(), 'hide': set()}
 
-    states = [load_yaml_file("states", name) for name in names]
+    states = [load_source_file(source, "states", name) for name in names]
     for state in states:
         try:
             merged_states['show'].update(set(state['show']))
@@ -98,28 +107,30 @@ def merge_states(names):
     return merged_states
 
 
-def load_preset(name):
+def load_preset(name, source=None):
     """Load a preset file by name by looking in the 'presets' subdirectory.
 
     :param name: the filename (no extension) of the preset YAML file
+    :param source: where to load files from; see util.load_source_file()
     :return: result of loading the specified file
     """
-    return load_yaml_file("presets", name)
+    return load_source_file(source, "presets", name)
 
 
-def format_preset(preset):
+def format_preset(preset, source=None):
     """Parses preset information to be in a YAML-friendly format.
 
     :param preset: a dictionary of tabs information
+    :param source: where to load files from; see util.load_source_file()
     :return: a list containing the same information, ready for export to an overview YAML file
     """
 
-    states = merge_states(preset['states'])
+    states = merge_states(preset['states'], source)
     return [
         format_preset_name(preset), [
             ['alwaysShownStates', states['show']],
             ['filteredStates', states['hide']],
-            ['groups', merge_groups(preset['groups'])],
+            ['groups', merge_groups(preset['groups'], source)],
         ]]
 
 
@@ -166,17 +177,64 @@ def determine_new_entities(filename="__new"):
     write_annotated_groups("groups/" + filename + ".yml", new_groups)  # E.g., "_entity_insurgency-pirates"
 
 
-def compile_overview(path, ov):
-    """Combines all given information to produce a single YAML file formatted to be imported as an EVE overview.
+def sweep_groups(rewrite=False):
+    """
+    Checks every group ID in every file in the 'groups' subdirectory against the SDE, reporting IDs that are unknown,
+    not published, or whose category does not match the category given by the filename (e.g. "_celestial_wreck" should
+    only contain groups from the "Celestial" category). Depends on invGroups and invCategories files being present in
+    the current directory:  https://www.fuzzwork.co.uk/dump/latest/
+    :param rewrite: if True, also re-write in place the root groups files whose annotation comments have changed
+    :return: a dictionary keyed by 'unknown', 'unpublished' and 'miscategorized', each a list of (filename, group ID)
+    """
+    invgroups = load_invgroups()
+    report = {'unknown': [], 'unpublished': [], 'miscategorized': []}
+
+    for filename in sorted(os.listdir("groups")):
+        if filename[-4:] != ".yml" or not os.path.isfile(os.path.join("groups", filename)):
+            continue
+        name = filename[:-4]
+        group = load_yaml_file("groups", name, plain=True) or {}
+        types = group.get('types') or []
+
+        # Root groups files are named "_<category>_<name>", where <category> may itself contain underscores
+        category = name[1:].rsplit("_", 1)[0] if name.startswith("_") else None
+
+        for group_id in types:
+            if group_id not in invgroups:
+                report['unknown'].append((name, group_id))
+                continue
+            if not invgroups[group_id]['published']:
+                report['unpublished'].append((name, group_id))
+            if category and invgroups[group_id]['cat_name'].lower().replace(" ", "_") != category:
+                report['miscategorized'].append((name, group_id))
+
+        if rewrite and types and not group.get('include'):
+            update_annotated_groups(os.path.join("groups", filename), types, invgroups)
+
+    for problem, entries in report.items():
+        print(f"{len(entries)} {problem} group IDs")
+        for name, group_id in entries:
+            group_name = invgroups[group_id]['name'] if group_id in invgroups else "UNKNOWN"
+            category_name = invgroups[group_id]['cat_name'] if group_id in invgroups else "UNKNOWN"
+            print(f"  {name}: {group_id:<10}# {group_name} ({category_name})")
+
+    return report
+
+
+def overview_sections(ov, source=None, name="", cache=None):
+    """Loads and formats each section of an overview, in output order. The static sections (appearance, columns, labels
+    and settings) are the same for many overviews, so they can be kept in a cache shared between calls.
 
-    :param path: the destination path for the new overview file (will over-write existing files)
     :param ov: dictionary of overview information
+    :param source: where to load files from; see util.load_source_file()
+    :param name: name of the overview being built, used in error messages
+    :param cache: optional dictionary in which loaded static sections are kept, keyed by (subdirectory, filename)
+    :return: list of (key, data) tuples, where key is the (subdirectory, filename) of a static section or None for the
+     tabSetup and presets sections
     """
-    merged_overviews = {}
-    overview = ov.copy()
-
+    sections = []
     presets = []
-    for k, v in overview.items():
+    for k, v in ov.items():
         k_plural = plu.plural(k) if plu.singular_noun(k) is False else k  # overkill
 
         if k == "tabs":
@@ -186,67 +244,228 @@ def compile_overview(path, ov):
                 for p in v:
                     presets.append(
                         format_preset(
-                            load_preset(p)
+                            load_preset(p, source), source
                         )
                     )
             except TypeError:  # 'NoneType' is not iterable
                 pass
-        else:
+        elif k == "tab":
             try:
-                opts = load_yaml_file(k_plural, v)
+                sections.append((None, format_tabs(load_source_file(source, k_plural, v), source)))
             except FileNotFoundError as e:
-                raise Exception("File not found while processing overview file " + path) from e
-
-            if k == "tab":
+                raise Exception("File not found while processing overview file " + name) from e
+        else:
+            key = (k_plural, v)
+            if cache is None or key not in cache:
                 try:
-                    merged_overviews.update(format_tabs(opts))
+                    opts = load_source_file(source, k_plural, v)
                 except FileNotFoundError as e:
-                    raise Exception("File not found while processing overview file " + path) from e
-            else:
-                merged_overviews.update(opts)
+                    raise Exception("File not found while processing overview file " + name) from e
+                if cache is not None:
+                    cache[key] = opts
+            sections.append((key, cache[key] if cache is not None else opts))
 
-    merged_overviews['presets'] = presets
+    sections.append((None, {'presets': presets}))
 
-    write_yaml_file(merged_overviews, path)
+    return sections
 
 
-def compile_overviews():
-    """Compile all overview files given in the "overviews" (lower-case 'o') subdirectory.
+def build_overview(ov, source=None, name="", cache=None):
+    """Combines all given information to produce the data for a single overview, ready to be formatted as an EVE
+    overview YAML file. Nothing is written to disk.
+
+    :param ov: dictionary of overview information
+    :param source: where to load files from; see util.load_source_file()
+    :param name: name of the overview being built, used in error messages
+    :param cache: optional dictionary of static sections shared between calls; see overview_sections()
+    :return: dictionary of overview data
     """
+    merged_overviews = {}
+    for key, data in overview_sections(ov, source, name, cache):
+        # Static sections may be shared through the cache, so give each overview its own copy
+        merged_overviews.update(copy.deepcopy(data) if key is not None else data)
 
-    def all_preset_names():
-        """
-        Retrieve all preset names from .YML files in 'presets' directory. This only needs to be done once, so store
-        result internal to function and perform checks to ensure we don't subsequently hit disk again.
-        :return: list of names for all preset files
-        """
-        try:
-            length_all = len(all_preset_names.all)
-        except AttributeError:
-            all_preset_names.all = []
-            length_all = 0
-        if length_all < 1:
-            all_preset_names.all = [filename for filename in sorted(os.listdir("presets"))
-                                   if filename[-4:] == ".yml" and os.path.isfile(os.path.join("presets", filename))
-                                   ]
-        return all_preset_names.all
-
-    for filename in os.listdir("overviews"):
-        f = os.path.join("overviews", filename)
-        if filename[-4:] == ".yml" and os.path.isfile(f):
-            filename = filename[:-4]
+    return merged_overviews
+
+
+def render_sections(sections, compact=False, fragments=None):
+    """Formats the sections of an overview (see overview_sections()) as the text of an EVE overview YAML file. Static
+    sections are formatted once and kept as YAML fragments, so that overviews sharing them are assembled from the cached
+    text plus their own tabSetup and presets.
+
+    :param sections: list of (key, data) tuples as given by overview_sections()
+    :param compact: if True, format in compact (flow-style lists, minimal whitespace) format
+    :param fragments: optional dictionary in which formatted static sections are kept, keyed by (subdirectory,
+     filename, compact)
+    :return: the YAML text, identical to formatting the merged sections with util.dump_yaml()
+    """
+    if fragments is None:
+        fragments = {}
+
+    # Fragments can only be concatenated if no section overrides a key given by an earlier one
+    keys = [k for _, data in sections for k in data]
+    if len(keys) != len(set(keys)):
+        merged_overviews = {}
+        for _, data in sections:
+            merged_overviews.update(data)
+        return dump_yaml(merged_overviews, compact=compact)
+
+    texts = []
+    for key, data in sections:
+        if key is None:
+            texts.append(dump_yaml(data, write_preamble=False, compact=compact, explicit_start=False))
+        else:
+            fragment_key = key + (compact,)
+            if fragment_key not in fragments:
+                fragments[fragment_key] = dump_yaml(dict(data), write_preamble=False, compact=compact,
+                                                    explicit_start=False)
+            texts.append(fragments[fragment_key])
+
+    return preamble + "---\n" + "".join(texts)
+
+
+def render_overview(ov, source=None, name="", compact=False, cache=None, fragments=None):
+    """Formats a single overview as the text of an EVE overview YAML file.
+
+    :param ov: dictionary of overview information
+    :param source: where to load files from; see util.load_source_file()
+    :param name: name of the overview being built, used in error messages
+    :param compact: if True, format in compact (flow-style lists, minimal whitespace) format
+    :param cache: optional dictionary of loaded static sections shared between calls; see overview_sections()
+    :param fragments: optional dictionary of formatted static sections shared between calls; see render_sections()
+    :return: the YAML text, identical to formatting the result of build_overview() with util.dump_yaml()
+    """
+    return render_sections(overview_sections(ov, source, name, cache), compact, fragments)
+
+
+def compile_overview(path, ov, compact=False, source=None, cache=None, fragments=None):
+    """Combines all given information to produce a single YAML file formatted to be imported as an EVE overview.
+
+    :param path: the destination path for the new overview file (will over-write existing files)
+    :param ov: dictionary of overview information
+    :param compact: if True, write the overview file in compact (flow-style lists, minimal whitespace) format, and
+     report its size relative to the same overview in block style
+    :param source: where to load files from; see util.load_source_file()
+    :param cache: optional dictionary of loaded static sections shared between calls; see overview_sections()
+    :param fragments: optional dictionary of formatted static sections shared between calls; see render_sections()
+    :return: the size in bytes of the written overview file
+    """
+    sections = overview_sections(ov, source, path, cache)
+
+    size = write_text_file(render_sections(sections, compact, fragments), path)
+    if compact:
+        block_size = len(render_sections(sections, False, fragments).encode("utf-8"))
+        print(f"  {block_size} -> {size} bytes ({100 * (block_size - size) / block_size:.1f}% smaller)")
+
+    return size
+
+
+def overview_bundles(source=None, overview_pattern="*", tab_pattern="*"):
+    """Lists every overview bundle described by the files in the "overviews" (lower-case 'o') subdirectory, one for
+    each of their tabs entries. Only overview files matching the given pattern are loaded.
+
+    :param source: where to load files from; see util.load_source_file()
+    :param overview_pattern: shell-style pattern (e.g. "pho" or "p*") for the overview filenames to include
+    :param tab_pattern: shell-style pattern (e.g. "layout-compact" or "layout-*") for the tab names to include
+    :return: list of (overview filename, tab name, dictionary of overview information) tuples
+    """
+    bundles = []
+    all_presets = None
 
+    for filename in fnmatch.filter(list_source_files(source, "overviews"), overview_pattern):
+        overview = load_source_file(source, "overviews", filename)
+        presets = overview.get('presets', {})
+
+        for tab_name in fnmatch.filter(overview['tabs'], tab_pattern):
+            if tab_name not in presets and all_presets is None:
+                all_presets = list_source_files(source, "presets")  # Default for tab is to use ALL presets
+
+            ov = dict(overview)
+            ov['tab'] = tab_name
+            ov['presets'] = presets.get(tab_name, all_presets)
+            bundles.append((filename, tab_name, ov))
+
+    return bundles
+
+
+def build_overviews(source=None):
+    """Builds all overview bundles in memory, without reading from or writing to the current directory (unless that is
+    the given source).
+
+    :param source: where to load files from; see util.load_source_file()
+    :return: dictionary of overview data keyed by output filename (e.g. "pho_core.yaml")
+    """
+    cache = {}
+    return {f"{filename}_{tab_name}.yaml": build_overview(ov, source, filename, cache)
+            for filename, tab_name, ov in overview_bundles(source)}
+
+
+def render_overviews(source=None, compact=False):
+    """Builds all overview bundles in memory and formats them as they would be written by compile_overviews().
+
+    :param source: where to load files from; see util.load_source_file()
+    :param compact: if True, format in compact (flow-style lists, minimal whitespace) format
+    :return: dictionary of UTF-8 encoded overview files keyed by output filename (e.g. "pho_core.yaml")
+    """
+    cache, fragments = {}, {}
+    return {f"{filename}_{tab_name}.yaml":
+            render_overview(ov, source, filename, compact, cache, fragments).encode("utf-8")
+            for filename, tab_name, ov in overview_bundles(source)}
+
+
+def compile_overviews(compact=False, overview_pattern="*", tab_pattern="*"):
+    """Compile all overview files given in the "overviews" (lower-case 'o') subdirectory. Only the files needed by the
+    selected bundles (their tabs file, and the presets, groups and states these reference) are loaded.
+
+    :param compact: if True, write compact overview files under "Overview/compact" instead, reporting the size of each
+     relative to the same overview in block style
+    :param overview_pattern: shell-style pattern for the overview filenames to compile; see overview_bundles()
+    :param tab_pattern: shell-style pattern for the tab names to compile; see overview_bundles()
+    :return: list of paths of the written overview files
+    """
+    bundles = overview_bundles(None, overview_pattern, tab_pattern)
+
+    out_dir = os.path.join("Overview", "compact") if compact else "Overview"
+    if bundles:
+        os.makedirs(out_dir, exist_ok=True)
+
+    cache, fragments = {}, {}
+    paths = []
+    current_filename = None
+    for filename, tab_name, overview in bundles:
+        if filename != current_filename:
+            current_filename = filename
             print(f"Working with overview file {filename}")
-            overview = load_yaml_file("overviews", filename)
-            presets = overview.get('presets', {})
 
-            for tab_name in overview['tabs']:
-                overview['tab'] = tab_name
-                overview['presets'] = presets.get(tab_name, all_preset_names())  # Default for tab is to use ALL presets
+        print(f" {tab_name}.yaml")
+        path = os.path.join(out_dir, f"{filename}_{tab_name}.yaml")
+        compile_overview(path, overview, compact=compact, cache=cache, fragments=fragments)
+        paths.append(path)
 
-                print(f" {tab_name}.yaml")
-                compile_overview(os.path.join("Overview", f"{filename}_{tab_name}.yaml"), overview)
+    return paths
 
 
 if __name__ == "__main__":
-    compile_overviews()
+    parser = argparse.ArgumentParser(description="EVE Python Overview Generator")
+    parser.add_argument("--compact", action="store_true",
+                        help="write compact overview files under Overview/compact")
+    subparsers = parser.add_subparsers(dest="command")
+    sweep_parser = subparsers.add_parser("sweep", help="check groups files against the SDE")
+    sweep_parser.add_argument("--rewrite", action="store_true",
+                              help="re-write annotation comments of root groups files in place")
+    build_parser = subparsers.add_parser("build", help="compile only the matching overview bundles")
+    build_parser.add_argument("overview", help="overview filename or shell-style pattern, e.g. 'pho'")
+    build_parser.add_argument("tab", nargs="?", default="*",
+                              help="tab name or shell-style pattern, e.g. 'layout-compact' or 'layout-*'")
+    # SUPPRESS keeps the subparser from resetting a --compact given before "build"
+    build_parser.add_argument("--compact", action="store_true", default=argparse.SUPPRESS,
+                              help="write compact overview files under Overview/compact")
+    args = parser.parse_args()
+
+    if args.command == "sweep":
+        sweep_groups(rewrite=args.rewrite)
+    elif args.command == "build":
+        if not compile_overviews(compact=args.compact, overview_pattern=args.overview, tab_pattern=args.tab):
+            parser.error(f"no overview bundles match '{args.overview}' '{args.tab}'")
+    else:
+        compile_overviews(compact=args.compact)
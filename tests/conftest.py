@@ -0,0 +1,34 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SOURCE_DIRS = ["overviews", "tabs", "presets", "groups", "states", "appearances", "columns", "labels", "settings"]
+
+
+@pytest.fixture(scope="session")
+def repo_root():
+    """Path to the repository root, used as the source for compiling the PHO overviews."""
+    return REPO_ROOT
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    """A copy of the overview sources and of pog itself, so that compiling can write without touching the repo."""
+    tree = tmp_path / "tree"
+    for subdir in SOURCE_DIRS:
+        shutil.copytree(os.path.join(REPO_ROOT, subdir), tree / subdir)
+    for filename in ["pog.py", "util.py"]:
+        shutil.copy(os.path.join(REPO_ROOT, filename), tree / filename)
+    return tree
+
+
+@pytest.fixture(scope="session")
+def block_overviews():
+    """Block-style bytes of every PHO overview bundle, keyed by output filename. Compiling is slow, so do it once."""
+    import pog
+    return pog.render_overviews(REPO_ROOT)
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pog
+
+
+def test_build_single_tab_matches_full_build(source_tree, block_overviews, monkeypatch):
+    monkeypatch.chdir(source_tree)
+    paths = pog.compile_overviews(overview_pattern="pho", tab_pattern="layout-compact")
+
+    assert paths == [os.path.join("Overview", "pho_layout-compact.yaml")]
+    assert os.listdir(source_tree / "Overview") == ["pho_layout-compact.yaml"]
+    assert (source_tree / paths[0]).read_bytes() == block_overviews['pho_layout-compact.yaml']
+
+
+def test_build_glob(source_tree, monkeypatch):
+    monkeypatch.chdir(source_tree)
+    paths = pog.compile_overviews(overview_pattern="ph?", tab_pattern="layout-*")
+
+    assert sorted(os.path.basename(path) for path in paths) == [
+        "pho_layout-compact.yaml", "pho_layout-logi.yaml", "pho_layout-mining.yaml", "pho_layout-subcap.yaml"]
+
+
+@pytest.mark.parametrize("args", [
+    ["--compact", "build", "pho", "layout-compact"],
+    ["build", "pho", "layout-compact", "--compact"],
+])
+def test_build_cli_compact(source_tree, args):
+    subprocess.run([sys.executable, "pog.py"] + args, cwd=source_tree, check=True, capture_output=True)
+
+    assert os.listdir(source_tree / "Overview" / "compact") == ["pho_layout-compact.yaml"]
+    assert not os.path.exists(source_tree / "Overview" / "pho_layout-compact.yaml")
+
+
+@pytest.mark.parametrize("args", [["build", "nope"], ["--compact", "build", "pho", "nope"]])
+def test_build_cli_no_match(source_tree, args):
+    result = subprocess.run([sys.executable, "pog.py"] + args, cwd=source_tree, capture_output=True, text=True)
+
+    assert result.returncode != 0
+    assert "no overview bundles match" in result.stderr
+    assert not os.path.exists(source_tree / "Overview")
@@ -0,0 +1,51 @@
+import os
+
+import pog
+from conftest import SOURCE_DIRS
+from util import dump_yaml
+
+
+def test_render_overviews_matches_compile_overviews(repo_root, source_tree, tmp_path, monkeypatch):
+    # Reference: compile_overviews() run on a copy of the sources, writing to disk
+    monkeypatch.chdir(source_tree)
+    pog.compile_overviews()
+    compiled = {name: (source_tree / "Overview" / name).read_bytes()
+                for name in os.listdir(source_tree / "Overview")}
+
+    # In-memory builds from a different working directory, which must stay untouched
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+
+    mapping = {}
+    for subdir in SOURCE_DIRS:
+        path = os.path.join(repo_root, subdir)
+        mapping[subdir] = {}
+        for filename in os.listdir(path):
+            if filename.endswith(".yml"):
+                with open(os.path.join(path, filename)) as file:
+                    mapping[subdir][filename[:-4]] = file.read()
+
+    assert pog.render_overviews(repo_root) == compiled
+    assert pog.render_overviews(mapping) == compiled
+    assert os.listdir(elsewhere) == []
+
+
+def test_cached_sections_not_shared_between_bundles(repo_root):
+    overviews = pog.build_overviews(repo_root)
+
+    core, pvx = overviews['pho_core.yaml'], overviews['pho_pvx.yaml']
+    assert core['flagOrder'] == pvx['flagOrder']
+    assert core['flagOrder'] is not pvx['flagOrder']
+
+    core['flagOrder'].append(0)
+    assert 0 not in pvx['flagOrder']
+
+
+def test_render_from_fragments_matches_dump(repo_root):
+    # Bundles assembled from cached fragments must be identical to dumping the merged data in one go
+    layouts = {name: data for name, data in pog.build_overviews(repo_root).items() if "layout" in name}
+    for compact in (False, True):
+        rendered = pog.render_overviews(repo_root, compact=compact)
+        for name, data in layouts.items():
+            assert rendered[name] == dump_yaml(data, compact=compact).encode("utf-8"), name
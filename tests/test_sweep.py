@@ -0,0 +1,60 @@
+import pytest
+
+import pog
+
+INV_CATEGORIES = """categoryID,categoryName,iconID,published
+6,Ship,,1
+40,Sovereignty Structures,,1
+"""
+
+INV_GROUPS = """groupID,categoryID,groupName,iconID,useBasePrice,anchored,anchorable,fittableNonSingleton,published
+27,6,Battleship,,0,0,0,0,1
+547,6,Carrier,,0,0,0,0,0
+1012,40,Infrastructure Hub,,0,0,0,0,1
+1025,40,Territorial Claim Unit,,0,0,0,0,1
+"""
+
+
+@pytest.fixture
+def sde_tree(tmp_path, monkeypatch):
+    """A minimal tree of groups files plus invGroups/invCategories CSVs, set as the current directory."""
+    (tmp_path / "invCategories.csv").write_text(INV_CATEGORIES)
+    (tmp_path / "invGroups.csv").write_text(INV_GROUPS)
+
+    groups = tmp_path / "groups"
+    groups.mkdir()
+    # Multi-word category prefix, all IDs fine; CRLF line endings
+    (groups / "_sovereignty_structures_tcu-ihub.yml").write_bytes(
+        b"---\r\ntypes:\r\n  - 1012      # Infrastructure Hub\r\n  - 1025      # Territorial Claim Unit\r\n\r\n")
+    # Unknown ID (99999), unpublished ID (547) and wrong-category ID (1012); stale annotation for 27
+    (groups / "_ship_mixed.yml").write_text(
+        "---\ntypes:\n  - 27        # Old Battleship\n  - 547       # Carrier\n"
+        "  - 1012      # Infrastructure Hub\n  - 99999     # Removed\n\n")
+    # Composite files have no category to check
+    (groups / "ships.yml").write_text("---\ninclude:\n  - _ship_mixed\n")
+
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_sweep_classifies_ids(sde_tree):
+    report = pog.sweep_groups()
+
+    assert report == {
+        'unknown': [('_ship_mixed', 99999)],
+        'unpublished': [('_ship_mixed', 547)],
+        'miscategorized': [('_ship_mixed', 1012)],
+    }
+
+
+def test_sweep_rewrite_only_changed_files(sde_tree):
+    tcu = sde_tree / "groups" / "_sovereignty_structures_tcu-ihub.yml"
+    tcu_before = tcu.read_bytes()
+    (sde_tree / "groups" / "_ship_mixed.yml").write_bytes(
+        b"---\r\ntypes:\r\n  - 27        # Old Battleship\r\n  - 99999     # Removed\r\n")
+
+    pog.sweep_groups(rewrite=True)
+
+    assert tcu.read_bytes() == tcu_before
+    assert (sde_tree / "groups" / "_ship_mixed.yml").read_bytes() == \
+        b"---\r\ntypes:\r\n  - 27        # Battleship\r\n  - 99999     # UNKNOWN\r\n\r\n"
@@ -1,6 +1,8 @@
 import inflect
 import csv
+import io
 import os.path
+from collections.abc import Mapping
 
 # Enables pluralizing nouns; a less-than-perfect holdover from the Ruby implementation
 plu = inflect.engine()
@@ -34,41 +36,126 @@ else:
 
     SQ = ruamel.yaml.scalarstring.SingleQuotedScalarString
 
+    # As above, but without the '---' start marker, for fragments that are concatenated into a single document
+    yaml_fragment = ruamel.yaml.YAML()
 
-def write_yaml_file(data, path, write_preamble=True):
+    # Compact output: leaf lists (e.g. group IDs) in flow style, no comments, no line wrapping. Uses the C emitter
+    # from ruamel.yaml.clib when available, which is considerably faster than the round-trip dumper above.
+    def compact_dumper(explicit_start):
+        dumper = ruamel.yaml.YAML(typ='safe')
+        dumper.explicit_start = explicit_start
+        dumper.allow_unicode = True
+        dumper.default_flow_style = None
+        dumper.width = 1 << 20
+        dumper.representer.sort_base_mapping_type_on_output = False
+        return dumper
+
+    compact_yaml = compact_dumper(True)
+    compact_yaml_fragment = compact_dumper(False)
+
+    # Plain loading (no comments or formatting preserved) for when only the data matters, e.g. bulk checks
+    safe_yaml = ruamel.yaml.YAML(typ='safe')
+
+
+def plain_data(data):
+    """Converts loaded/commented YAML data (CommentedMap, ScalarFloat, SQ, etc.) into plain Python types, dropping
+    comments and formatting, so that it can be written by a 'safe' YAML dumper.
+
+    :param data: the YAML-compatible data to be converted
+    :return: the same data made up only of dicts, lists, strings, numbers, booleans and None
+    """
+    if isinstance(data, dict):
+        return {plain_data(k): plain_data(v) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [plain_data(v) for v in data]
+    if isinstance(data, str):
+        return str(data)
+    if isinstance(data, bool):
+        return bool(data)
+    if isinstance(data, int):
+        return int(data)
+    if isinstance(data, float):
+        return float(data)
+    return data
+
+
+# Boilerplate identifying files as being generated by POG
+preamble = "# This EVE Online overview generated by eve-pog (EVE Python Overview Generator).\n" \
+           "# Adapted from 'EVE Online Overview Generator' by Leon Razor.\n" \
+           "# Created for Pandemic Horde.\n"
+
+
+def dump_yaml(data, write_preamble=True, compact=False, explicit_start=True):
+    """Formats the given data as YAML text in a standard format, and with a boilerplate preamble identifying the text as
+    being generated by POG.
+
+    :param data: the YAML-compatible data to be formatted
+    :param write_preamble: if True, start the text with the POG preamble
+    :param compact: if True, write leaf lists in flow style with minimal whitespace and no comments
+    :param explicit_start: if False, omit the '---' document start marker (e.g. for fragments that are concatenated)
+    :return: the YAML text
+    """
+    stream = io.StringIO()
+    if write_preamble:
+        stream.write(preamble)
+
+    if use_pyyaml:
+        with BlankNone():
+            if compact:
+                yaml.safe_dump(data, stream, allow_unicode=True, sort_keys=False, explicit_start=explicit_start,
+                               default_flow_style=None, width=1 << 20)
+            else:
+                yaml.safe_dump(data, stream, allow_unicode=True, sort_keys=False, explicit_start=explicit_start)
+    else:
+        if compact:
+            dumper = compact_yaml if explicit_start else compact_yaml_fragment
+            dumper.dump(plain_data(data), stream)
+        else:
+            dumper = yaml if explicit_start else yaml_fragment
+            dumper.dump(data, stream)
+
+    return stream.getvalue()
+
+
+def write_yaml_file(data, path, write_preamble=True, compact=False):
     """Writes the given data to a specified YAML file in a standard format, and with a boilerplate preamble identifying
     the file as being generated by POG.
 
     :param data: the YAML-compatible data to be written
     :param path: the path and filename for the destination file (.YML or .YAML extension should be included)
+    :param compact: if True, write leaf lists in flow style with minimal whitespace and no comments
+    :return: the size in bytes of the written YAML text (UTF-8 encoded, before any platform newline conversion)
     """
-    preamble = "# This EVE Online overview generated by eve-pog (EVE Python Overview Generator).\n" \
-               "# Adapted from 'EVE Online Overview Generator' by Leon Razor.\n" \
-               "# Created for Pandemic Horde.\n"
+    return write_text_file(dump_yaml(data, write_preamble=write_preamble, compact=compact), path)
 
-    if use_pyyaml:
-        with BlankNone(), open(path, "w") as fileout:
-            if write_preamble:
-                fileout.write(preamble)
-            yaml.safe_dump(data, fileout, allow_unicode=True, sort_keys=False, explicit_start=True)
-    else:
-        with open(path, "w") as fileout:
-            if write_preamble:
-                fileout.write(preamble)
-            yaml.dump(data, fileout)
+
+def write_text_file(text, path):
+    """Writes already formatted text (e.g. from dump_yaml()) to a specified file.
+
+    :param text: the text to be written
+    :param path: the path and filename for the destination file
+    :return: the size in bytes of the written text (UTF-8 encoded, before any platform newline conversion)
+    """
+    with open(path, "w") as fileout:
+        fileout.write(text)
+
+    return len(text.encode("utf-8"))
 
 
-def load_yaml_file(subdir, filename):
+def load_yaml_file(subdir, filename, plain=False):
     """Loads data from a YAML-compatible file, trying both .YML and .YAML extensions.
 
     :param subdir: subdirectory to look in for the YAML file
     :param filename: filename (without extension) of the YAML file
+    :param plain: if True, load with the (much faster) safe loader, discarding comments and formatting
     :return: the data parsed from the file
     """
     def open_and_read(file):
         with open(file, 'r') as yaml_file:
             if use_pyyaml:
                 return yaml.safe_load(yaml_file)
+            elif plain:
+                return safe_yaml.load(yaml_file)
             else:
                 return yaml.load(yaml_file)
 
@@ -80,6 +167,45 @@ def load_yaml_file(subdir, filename):
         return open_and_read(file_path)
 
 
+def load_source_file(source, subdir, filename):
+    """Loads data for a named YAML file from a source, which is either a root directory or an in-memory mapping.
+
+    :param source: None (the current directory), a path to a root directory containing the usual subdirectories, or a
+     mapping of subdirectory name to a mapping of filename (without extension) to either parsed data or YAML text.
+     YAML text is parsed as if loaded from disk, so renders byte-identically; parsed plain data (dicts, lists, str)
+     has the same content but renders without the quoting and comments kept from the original files
+    :param subdir: subdirectory to look in for the YAML file
+    :param filename: filename (without extension) of the YAML file
+    :return: the data parsed from the file
+    """
+    if not isinstance(source, Mapping):
+        return load_yaml_file(os.path.join(source or "", subdir), filename)
+
+    try:
+        data = source[subdir][filename]
+    except KeyError as e:
+        raise FileNotFoundError(f"No entry '{filename}' under '{subdir}' in source mapping") from e
+
+    if isinstance(data, str):
+        return yaml.safe_load(data) if use_pyyaml else yaml.load(data)
+    return data
+
+
+def list_source_files(source, subdir):
+    """Lists the names of all YAML files in a subdirectory of a source (see load_source_file()).
+
+    :param source: None (the current directory), a path to a root directory, or an in-memory mapping
+    :param subdir: subdirectory to look in
+    :return: sorted list of filenames (without extension)
+    """
+    if isinstance(source, Mapping):
+        return sorted(source.get(subdir, {}))
+
+    path = os.path.join(source or "", subdir)
+    return [filename[:-4] for filename in sorted(os.listdir(path))
+            if filename[-4:] == ".yml" and os.path.isfile(os.path.join(path, filename))]
+
+
 def load_invcategories():
     """
     Assumes existence of named CSV file from Fuzzwork's SDE conversion. Used for adding comments in output YAML files.
@@ -100,22 +226,60 @@ def load_invgroups():
     return {int(row['groupID']): {
         'name': row['groupName'],
         'cat_name': cats[int(row['categoryID'])],
-        'cat': int(row['categoryID'])
+        'cat': int(row['categoryID']),
+        'published': row['published'] == '1'
     } for row in rows}
 
 
-def write_annotated_groups(filename, types):
+def write_annotated_groups(filename, types, invgroups=None):
     """
     Writes a 'groups' YAML file, consisting of a list of group ID numbers keyed by the string "types", along
     with commented annotations indicating the group name for each entry.
     :param filename: output destination for this file, extension required
     :param types: the list of group IDs
+    :param invgroups: optional result of load_invgroups(), to avoid re-reading the SDE files for every call
     """
-    invgroups = load_invgroups()
-    types = sorted(types)
+    if invgroups is None:
+        invgroups = load_invgroups()
     with open(filename, "w") as fileout:
-        fileout.write("---\ntypes:\n")
-        for type in types:
-            fileout.write(f"  - {type:<10}# {invgroups[type]['name']}\n")
-        fileout.write("\n")
-    print(f"Wrote to file {filename}")
\ No newline at end of file
+        fileout.write(format_annotated_groups(types, invgroups))
+    print(f"Wrote to file {filename}")
+
+
+def format_annotated_groups(types, invgroups):
+    """
+    Formats the text of a 'groups' YAML file as written by write_annotated_groups().
+    :param types: the list of group IDs
+    :param invgroups: result of load_invgroups()
+    :return: the text of the groups file
+    """
+    lines = ["---\ntypes:\n"]
+    for type in sorted(types):
+        name = invgroups[type]['name'] if type in invgroups else "UNKNOWN"
+        lines.append(f"  - {type:<10}# {name}\n")
+    lines.append("\n")
+    return "".join(lines)
+
+
+def update_annotated_groups(filename, types, invgroups):
+    """
+    Re-writes an existing 'groups' YAML file as write_annotated_groups() would, but only if this changes its content
+    (ignoring line endings and trailing whitespace). The file's existing line endings are kept.
+    :param filename: the existing groups file, extension required
+    :param types: the list of group IDs
+    :param invgroups: result of load_invgroups()
+    :return: True if the file was re-written
+    """
+    with open(filename, "r", newline="") as filein:
+        existing = filein.read()
+    text = format_annotated_groups(types, invgroups)
+
+    if existing.replace("\r\n", "\n").rstrip() == text.rstrip():
+        return False
+
+    if "\r\n" in existing:
+        text = text.replace("\n", "\r\n")
+    with open(filename, "w", newline="") as fileout:
+        fileout.write(text)
+    print(f"Wrote to file {filename}")
+    return True
\ No newline at end of file